@@ -1,12 +1,64 @@
+import functools
 import os
 import fontTools.ttLib
+from fontTools.ttLib.sfnt import SFNTReader, readTTCHeader
+from fontTools.ttLib.tables._n_a_m_e import table__n_a_m_e
 from enum import IntEnum, unique
-from logging import getLogger
+from logging import getLogger, DEBUG, INFO
 import coloredlogs
 
-# ログ出力の設定
+# ロガー取得(ログ出力の設定はFont.configure_loggingで行う)
 logger = getLogger("Font Property Detail")
-coloredlogs.install(level="INFO")
+
+def _read_name_table(reader):
+    """フォントファイルからネームテーブルのみ読み込み"""
+    # ネームテーブルの生データ取得
+    name_data = reader["name"]
+
+    # ネームテーブルのデコード
+    name_table = table__n_a_m_e("name")
+    name_table.decompile(name_data, None)
+
+    # レコードの(プラットフォームID, 言語ID, ネームID)の一覧(絞り込み用に一度だけ作成)
+    name_table.record_ids = tuple((record.platformID, record.langID, record.nameID) for record in name_table.names)
+
+    return name_table
+
+def _filter_record_indices(record_ids, want_names, want_plat, want_lang):
+    """指定したIDに一致するレコードのインデックスを順に取得(ネームIDは集合で指定、プラットフォームIDと言語IDは-1で全て)"""
+    return (
+        index
+        for index, (plat, lang, name) in enumerate(record_ids)
+        if name in want_names
+        and (want_plat == -1 or plat == want_plat)
+        and (want_lang == -1 or lang == want_lang)
+    )
+
+@functools.lru_cache(maxsize=32)
+def _load_name_tables(path, mtime_ns, is_collection):
+    """
+    フォントファイル内の各フォントのネームテーブル取得\n
+    ファイルパスと更新日時(ナノ秒)をキーにキャッシュする
+    """
+    with open(path, "rb") as file:
+        # TTCフォントファイル以外
+        if not is_collection:
+            return (_read_name_table(SFNTReader(file)),)
+
+        # TTCヘッダーからフォント数取得
+        font_count = readTTCHeader(file).numFonts
+        # ネームテーブルのオフセットとデコード済みネームテーブルの対応表
+        name_table_by_offset = {}
+        name_tables = []
+        for font_number in range(font_count):
+            reader = SFNTReader(file, fontNumber=font_number)
+            name_offset = reader.tables["name"].offset
+            # 他のフォントとネームテーブルを共有していない場合のみデコード
+            if name_offset not in name_table_by_offset:
+                name_table_by_offset[name_offset] = _read_name_table(reader)
+            name_tables.append(name_table_by_offset[name_offset])
+
+        return tuple(name_tables)
 
 class Font():
     """フォント"""
@@ -24,12 +76,8 @@ class Font():
         @classmethod
         def get_name_by_id(cls, id):
             """IDからクラス内の定数名取得"""
-            for member in cls:
-                # クラス内の定数の値とIDが一致
-                if member == id:
-                    return member.name
-            
-            return "Unknown"
+            # IDと定数名の対応表から取得
+            return _PLATFORM_NAME_BY_ID.get(id, "Unknown")
             
     @unique
     class Name(IntEnum):
@@ -92,12 +140,8 @@ class Font():
         @classmethod
         def get_name_by_id(cls, id):
             """IDからクラス内の定数名取得"""
-            for member in cls:
-                # クラス内の定数の値とIDが一致
-                if member == id:
-                    return member.name
-            
-            return "Unknown"
+            # IDと定数名の対応表から取得
+            return _NAME_NAME_BY_ID.get(id, "Unknown")
 
     @unique
     class WindowsLanguage(IntEnum):
@@ -112,12 +156,8 @@ class Font():
         @classmethod
         def get_name_by_id(cls, id):
             """IDからクラス内の定数名取得"""
-            for member in cls:
-                # クラス内の定数の値とIDが一致
-                if member == id:
-                    return member.name
-            
-            return "Unknown"
+            # IDと定数名の対応表から取得
+            return _WINDOWS_LANGUAGE_NAME_BY_ID.get(id, "Unknown")
 
     @unique
     class MacLanguage(IntEnum):
@@ -132,36 +172,35 @@ class Font():
         @classmethod
         def get_name_by_id(cls, id):
             """IDからクラス内の定数名取得"""
-            for member in cls:
-                # クラス内の定数の値とIDが一致
-                if member == id:
-                    return member.name
-            
-            return "Unknown"
+            # IDと定数名の対応表から取得
+            return _MAC_LANGUAGE_NAME_BY_ID.get(id, "Unknown")
 
     font_file_path = ""
     """フォントのファイルパス"""
 
+    font_file_extension = ""
+    """フォントファイルの拡張子(小文字)"""
+
+    @staticmethod
+    def configure_logging(level="INFO"):
+        """ログ出力の設定(coloredlogsによる色付きログ出力)"""
+        coloredlogs.install(level=level)
+
     def __init__(self, file_path) -> None:
-        self.font_file_path = file_path
+        # pathlib.Pathなども文字列のパスに変換
+        self.font_file_path = os.fspath(file_path)
+        self.font_file_extension = os.path.splitext(self.font_file_path)[1].lower()
 
-    def get_property_detail(self, name_id, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
-        """フォントのプロパティ詳細取得"""
+    def load_name_tables(self):
+        """フォントファイル内の各フォントのネームテーブル取得(読み込みエラー時は空)"""
         # 拡張子取得
-        file_extension = os.path.splitext(self.font_file_path)[1].lower()
-        
-        property_dict = {}
-        try:
-            # TTCフォントファイル
-            if file_extension == ".ttc":
-                font_collection = fontTools.ttLib.TTCollection(self.font_file_path)
-                for font_number, font in enumerate(font_collection):
-                    self.process_property_detail(font, name_id, platform_id, lang_id, property_dict)
+        file_extension = self.font_file_extension
 
-            # TTFまたはOTFフォントファイル
-            elif file_extension == ".ttf" or file_extension == ".otf":
-                font = fontTools.ttLib.TTFont(self.font_file_path)
-                self.process_property_detail(font, name_id, platform_id, lang_id, property_dict)
+        try:
+            # TTC、TTFまたはOTFフォントファイル
+            if file_extension in (".ttc", ".ttf", ".otf"):
+                # ネームテーブル取得(ファイルの更新日時が変わらない限りキャッシュを使用)
+                return _load_name_tables(self.font_file_path, os.stat(self.font_file_path).st_mtime_ns, file_extension == ".ttc")
 
             # 上記以外
             else:
@@ -176,109 +215,152 @@ class Font():
         except FileNotFoundError as e:
             logger.error(f"フォントファイルが見つかりませんでした: {e}")
 
-        return property_dict
+        return ()
+
+    def get_property_detail(self, name_id, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
+        """フォントのプロパティ詳細取得"""
+        # プロパティ詳細のレコードリスト
+        records = []
+        for name_table in self.load_name_tables():
+            records.extend(self.process_property_detail(name_table, name_id, platform_id, lang_id))
+
+        return records
+
+    def get_property_details(self, name_ids, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
+        """
+        複数のフォントのプロパティ詳細をまとめて取得\n
+        フォントファイルの読み込みとネームテーブルの走査は1回のみ
+        """
+        # ネームIDごとのプロパティ詳細のレコードリスト
+        records_by_name_id = {name_id: [] for name_id in name_ids}
 
-    def process_property_detail(self, font, name_id, platform_id, lang_id, property_dict):
+        for name_table in self.load_name_tables():
+            # このフォントのネームIDごとのレコードリスト
+            table_records = self.get_values_for_name_table(name_table, records_by_name_id, platform_id=platform_id, lang_id=lang_id)
+            for name_id, records in table_records.items():
+                # プロパティ詳細ログ出力
+                self.logging_property_detail(records)
+                records_by_name_id[name_id].extend(records)
+
+        return records_by_name_id
+
+    def process_property_detail(self, name_table, name_id, platform_id, lang_id):
         """フォントのプロパティ詳細取得の処理"""
         # プロパティ詳細取得
-        property_dict = self.get_value_for_name_table(font, name_id, platform_id=platform_id, lang_id=lang_id)
+        records = self.get_value_for_name_table(name_table, name_id, platform_id=platform_id, lang_id=lang_id)
         # プロパティ詳細ログ出力
-        self.logging_property_detail(property_dict)
+        self.logging_property_detail(records)
 
-    def logging_property_detail(self, property_dict):
-        """フォントのプロパティ詳細ログ出力"""
-        for property in property_dict:
-            name = property["name"]
-            platform = property["platform"]
-            lang = property["lang"]
-            value = property["value"]
-            logger.info(f"{name} ({platform}, {lang}): {value}")
-
-    def get_value_for_name_table(self, font, name_id, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
-        """フォントのネームテーブル内から値取得"""
-        logger.debug(f"引数: font: {font}, name_id: {name_id}, platform_id: {platform_id}, lang_id: {lang_id}")
-        # フォントファイルからネームテーブル取得
-        name_table = font['name']
+        return records
 
-        # 値リスト
-        value_list = []
+    def logging_property_detail(self, records):
+        """フォントのプロパティ詳細ログ出力"""
+        # INFOレベルのログ出力が無効
+        if not logger.isEnabledFor(INFO):
+            return
 
-        # ネームテーブル内のレコードを走査
-        for record in name_table.names:
-            logger.debug(f"PlatformID: {record.platformID}, LangID: {record.langID}, NameID: {record.nameID}, record: {record}")
+        for property in records:
+            logger.info("%s (%s, %s): %s", property["name"], property["platform"], property["lang"], property["value"])
 
-            # レコードのネームIDと指定したネームIDが一致
-            if record.nameID == name_id.value:
-                # 値リストにレコードのフォーマット済みディクショナリを追加
-                value_list.append(self.get_formatted_dict(record))
+    def get_value_for_name_table(self, name_table, name_id, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
+        """フォントのネームテーブル内から値取得"""
+        return self.get_values_for_name_table(name_table, (name_id,), platform_id=platform_id, lang_id=lang_id)[name_id]
 
-            # レコードが条件に一致
-            if self.is_matching_record(record, name_id, platform_id, lang_id):
-                # 走査終了
+    def get_values_for_name_table(self, name_table, name_ids, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
+        """
+        フォントのネームテーブル内から複数のネームIDの値をまとめて取得\n
+        プラットフォームIDと言語IDを両方指定した場合はネームIDごとに最初に一致したレコードのみ
+        """
+        # DEBUGレベルのログ出力が有効
+        if logger.isEnabledFor(DEBUG):
+            logger.debug("引数: name_table: %s, name_ids: %s, platform_id: %s, lang_id: %s", name_table, name_ids, platform_id, lang_id)
+
+        # ネームIDごとの値リスト
+        value_lists = {name_id: [] for name_id in name_ids}
+
+        # 指定したID(ALLは-1)
+        want_names = {name_id.value for name_id in value_lists}
+        want_plat = platform_id.value
+        want_lang = lang_id.value
+        first_only = want_plat != -1 and want_lang != -1
+        # 値が未取得のネームIDの数
+        remaining_count = len(value_lists)
+
+        # 条件に一致するレコードのみフォーマット済みディクショナリに変換してネームIDごとに追加
+        names = name_table.names
+        for index in _filter_record_indices(name_table.record_ids, want_names, want_plat, want_lang):
+            record = names[index]
+            value_list = value_lists[record.nameID]
+            if first_only:
+                # 取得済みのネームID
+                if value_list:
+                    continue
+                remaining_count -= 1
+            value_list.append(self.get_formatted_dict(record))
+
+            # すべてのネームIDで最初のレコードを取得済みの場合は走査終了
+            if first_only and remaining_count == 0:
                 break
-        
-        # 値リストなし
-        if not value_list:
-            logger.warning(f"プロパティ '{name_id.name}' が見つかりませんでした")
 
-        return value_list
+        # 値リストなし
+        for name_id, value_list in value_lists.items():
+            if not value_list:
+                logger.warning(f"プロパティ '{name_id.name}' が見つかりませんでした")
 
-    def is_matching_record(self, record, name_id, platform_id, lang_id):
-        """レコードの一致可否"""
-        # レコードのプラットフォームID、言語ID、ネームIDと指定した同IDが一致する場合はTrue
-        return (
-            record.platformID == platform_id.value
-            and record.langID == lang_id.value
-            and record.nameID == name_id.value
-        )
+        return value_lists
 
     def get_formatted_dict(self, record):
         """レコードのフォーマット済みディクショナリ取得"""
-        # インスタンス生成
-        platform = Font.Platform(record.platformID)
-        name = Font.Name(record.nameID) 
-        lang = None
-
-        # プラットフォームIDがWindows
-        if record.platformID == Font.Platform.WINDOWS:
-            # Windows言語IDのインスタンス生成
-            lang = Font.WindowsLanguage(record.langID)
-        # プラットフォームIDがMac
-        elif record.platformID == Font.Platform.MAC:
-            # Mac言語IDのインスタンス生成
-            lang = Font.MacLanguage(record.langID)
-        # 上記以外
-        else:
-            logger.warning(f"サポートされていないプラットフォームが含まれています。platformID: {record.platformID}")
+        # プラットフォームIDに対応する言語IDの定数名対応表取得
+        lang_name_by_id = _LANG_NAME_BY_ID_BY_PLATFORM.get(record.platformID)
 
-        # 言語IDのインスタンスあり
-        if lang is not None:
-            return {
-                "name": name.get_name_by_id(record.nameID),
-                "platform": platform.get_name_by_id(record.platformID),
-                "lang": lang.get_name_by_id(record.langID),
-                "value": str(record)
-            }
+        # サポートされていないプラットフォーム
+        if lang_name_by_id is None:
+            logger.warning(f"サポートされていないプラットフォームが含まれています。platformID: {record.platformID}")
+            lang_name = "Unknown"
         # 上記以外
         else:
-            return {
-                "name": name.get_name_by_id(record.nameID),
-                "platform": platform.get_name_by_id(record.platformID),
-                "lang": "Unknown",
-                "value": str(record)
-            }
-
-    def get_font_family_name(self):
+            lang_name = lang_name_by_id.get(record.langID, "Unknown")
+
+        # デコード済みの値取得(ネームテーブルはキャッシュされるため、レコードごとに初回のみデコード)
+        value = getattr(record, "decoded_value", None)
+        if value is None:
+            # レコードの値をデコード(デコードできない文字は置換)
+            value = record.decoded_value = record.toUnicode(errors="replace")
+
+        return {
+            "name": _NAME_NAME_BY_ID.get(record.nameID, "Unknown"),
+            "platform": _PLATFORM_NAME_BY_ID.get(record.platformID, "Unknown"),
+            "lang": lang_name,
+            "value": value
+        }
+
+    def get_font_family_name(self, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
         """フォントのファミリー名取得"""
         # フォントのプロパティ詳細取得
-        return self.get_property_detail(font.Name.FONT_FAMILY_NAME)
+        return self.get_property_detail(Font.Name.FONT_FAMILY_NAME, platform_id=platform_id, lang_id=lang_id)
 
-    def get_license_description(self):
+    def get_license_description(self, platform_id=Platform.ALL, lang_id=WindowsLanguage.ALL):
         """ライセンスの説明取得"""
         # フォントのプロパティ詳細取得
-        return self.get_property_detail(font.Name.LICENSE_DESCRIPTION)
+        return self.get_property_detail(Font.Name.LICENSE_DESCRIPTION, platform_id=platform_id, lang_id=lang_id)
+
+# IDと定数名の対応表
+_PLATFORM_NAME_BY_ID = {member.value: member.name for member in Font.Platform}
+_NAME_NAME_BY_ID = {member.value: member.name for member in Font.Name}
+_WINDOWS_LANGUAGE_NAME_BY_ID = {member.value: member.name for member in Font.WindowsLanguage}
+_MAC_LANGUAGE_NAME_BY_ID = {member.value: member.name for member in Font.MacLanguage}
+
+# プラットフォームIDと言語IDの定数名対応表の対応表
+_LANG_NAME_BY_ID_BY_PLATFORM = {
+    Font.Platform.WINDOWS.value: _WINDOWS_LANGUAGE_NAME_BY_ID,
+    Font.Platform.MAC.value: _MAC_LANGUAGE_NAME_BY_ID,
+}
 
 if __name__ == "__main__":
+    # ログ出力の設定
+    Font.configure_logging()
+
     # フォントファイルのパスを指定してプロパティ詳細を取得する
     font_file_path = "Bowli_rough_font-Regular.ttf"
 